@@ -32,163 +32,279 @@ Copyright (C) 2022  Mohammad L. Hussain
 import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.filedialog as tkfd
+import array
+import bisect
+import collections
 import ctypes
+import functools
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, ImageTk
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional, the grids are drawn with PIL alone without it
+    np = None
 
 DAILY_BIRTHS = 385000
 DAILY_DEATHS = 165000
 S_TO_EO_DIAMETER_RATIO = 211.60 # Ratio of sun's diameter to earth's orbital diameter
+WORLD_AREA_M2 = 510_072_000 * 1_000_000 # Earth's total surface area, in square meters
+MAX_GRID_PIXELS = 25_000_000 # Larger grids are scaled down, to avoid multi-GB allocations
+
+# Square-meters per unit, for the house-area and city-area unit dropdowns
+_HA_UNIT_FACTOR = {'sq. feet': 0.092903, 'sq. yards': 0.836127, 'sq. meters': 1.0}
+_CA_UNIT_FACTOR = {'sq. miles': 2.58999e6, 'sq. kms': 1e6}
+_NUM_RE = re.compile(r'^\s*-?(\d+\.?\d*|\.\d+)\s*$') # Plain decimals only, unlike float()
+_NUM_PREFIX_RE = re.compile(r'^\s*-?\d*\.?\d*\s*$') # ...or their prefixes, while being typed
+_TILE_SIZE = 512 # Scrolling grids are shown in square tiles of this many on-screen pixels
+_MAX_CACHED_TILES = 48 # Tiles scrolled out of view are kept up to this many, to scroll back
+
+# Palette-indices of the grids' colors. White is 255, so that 1-bit masks convert straight to it
+_BLACK, _GREEN, _RED, _WHITE = 0, 1, 2, 255
+_GRID_PALETTE = [0, 0, 0, 0, 128, 0, 255, 0, 0] + [0, 0, 0]*252 + [255, 255, 255]
+
+_save_pool = ThreadPoolExecutor(max_workers=2) # For PNG-encoding off the Tk main thread
+# The grids are mostly flat colors, so even zlib's fastest level gives them small PNG files
+_PNG_SAVE_OPTIONS = {'format': 'PNG', 'compress_level': 1, 'optimize': False}
+
+def _build_grid_array(width, height, inset_width=0, scale=1):
+    """
+    Renders the black & white pixel-grid (with its green inset and red marker-pixel) as
+    a (height*scale, width*scale) NumPy array of palette-indices, with each grid-cell drawn
+    directly as a scale x scale block, so that the double-scale display image needs no
+    separate upscaling. The 4 distinct rows are built first, and then broadcast over the
+    grid's rows, which is a handful of memory-bound copies that NumPy does at memcpy speed.
+    """
+    row_patterns = np.empty((4, width, scale), dtype=np.uint8)
+    row_patterns[0::2, 0::2] = _WHITE # The even rows start with a white cell...
+    row_patterns[0::2, 1::2] = _BLACK
+    row_patterns[1::2, 0::2] = _BLACK # ...and the odd rows with a black one
+    row_patterns[1::2, 1::2] = _WHITE
+    # The inset's rows are composited beforehand, so that each pixel is only written once
+    row_patterns[2, 0:inset_width] = _GREEN
+    row_patterns[3, 0:inset_width:2] = _GREEN
+    row_patterns = row_patterns.reshape(4, width*scale)
+
+    arr = np.empty((height*scale, width*scale), dtype=np.uint8)
+    cell_rows = arr.reshape(height, scale, width*scale) # a view, indexed by grid-row
+    cell_rows[0:inset_width:2] = row_patterns[2]
+    cell_rows[1:inset_width:2] = row_patterns[3]
+    cell_rows[inset_width + inset_width%2::2] = row_patterns[0]
+    cell_rows[inset_width + 1 - inset_width%2::2] = row_patterns[1]
+
+    cells = arr.reshape(height, scale, width, scale) # a view, indexed by grid-cell
+    cells[1:2, :, 1:2] = _RED # sliced, so that 1-pixel-wide grids don't raise IndexError
+    return arr
+
+
+def _pack_mask(width, height, even_row_byte, odd_row_byte):
+    """
+    Builds a 1-bit PIL mask whose even and odd rows repeat the given 8-pixel bit-patterns,
+    from packed row-bytes (8 pixels per byte, each row padded to a whole byte) repeated in
+    an array.array, so that the mask is loaded by PIL in a single frombytes call.
+    """
+    row_size = (width + 7) // 8
+    mask_bytes = array.array('B', [even_row_byte]*row_size + [odd_row_byte]*row_size)
+    mask_bytes *= (height + 1) // 2
+    del mask_bytes[row_size*height:]
+    return Image.frombytes("1", (width, height), mask_bytes.tobytes())
 
-def _get_grid_pattern_string(color):
-    even_row_str = "{ "
-    odd_row_str = "{ "
-    for i in range(2):
-        even_row_str += f"{color} {color} " if i % 2 else "#ffffff #ffffff "
-        odd_row_str += "#ffffff #ffffff " if i % 2 else f"{color} {color} "
-    even_row_str += "} "
-    odd_row_str += "} "
-    return even_row_str + even_row_str + odd_row_str + odd_row_str
 
+def _paste_grid_image(width, height, inset_width=0):
+    """
+    Draws the same pixel-grid as the function above using PIL alone, for when NumPy isn't
+    installed. The checkerboard is built as a 1-bit mask, whose 0/255 pixels are then used
+    directly as the black/white palette-indices, and the inset's green stripes are pasted
+    in one go through a second mask, so that all the per-pixel work is done by PIL's C code.
+    """
+    image = _pack_mask(width, height, 0b10101010, 0b01010101).convert("L")
+    if inset_width: # inset_height == inset_width
+        inset_mask = _pack_mask(inset_width, inset_width, 0b11111111, 0b10101010)
+        image.paste(_GREEN, (0, 0, inset_width, inset_width), inset_mask)
+    image.paste(_RED, (1, 1, 2, 2))
+    return image
 
-def draw_canvas_grid(width, height, use_scrollers, wintitle, inset_width=0, title_count=None):
+
+@functools.lru_cache(maxsize=8)
+def _build_pil_image(width, height, inset_width=0, scale=1):
     """
-    This is the workhorse function that takes a width and a height and draws a corresponding
-    grid using tk.Canvas. The grid is also drawn in-memory using PIL's ImageDraw module in
-    order to be able to save the image to PNG with high fidelity. Note that for proper scrolling,
-    I had to nest the actual canvas inside a frame inside an outer-canvas C. The scrollbars are
-    only created if the canvas-grid overflows the screen's dimensions (e.g. if it's greater than
-    0.86 of the screen's height)
+    Builds the palette-based ("P" mode) PIL image of a pixel-grid, at double-scale for
+    display, or at 1x for saving and for cropping the tiles of scrolling grids from. At 1
+    byte per pixel, it is a third of an RGB image's size.
+    The images are cached, as the same grids are often re-visualized or saved repeatedly,
+    so they are shared between windows and must only ever be read, never modified.
+    """
+    if np is None:
+        image = _paste_grid_image(width, height, inset_width)
+        if scale > 1:
+            image = image.resize((width*scale, height*scale), Image.NEAREST)
+    else:
+        image = Image.fromarray(_build_grid_array(width, height, inset_width, scale))
+    image.putpalette(_GRID_PALETTE) # This turns the "L" mode image of indices into a "P" image
+    return image
+
+
+def _show_visible_tiles(canvas, image, scale=2):
+    """
+    Shows the part of a scrolling grid that is in the canvas' view, as image-items of square
+    tiles cropped from the 1x grid-image and scaled up. A tile is only made once it is first
+    scrolled into view, and the least recently seen ones are deleted once more than
+    _MAX_CACHED_TILES are kept, so the drawing & memory costs follow the viewport's size
+    instead of the whole grid's.
+    """
+    tiles = canvas.tiles
+    x0, y0 = int(canvas.canvasx(0)), int(canvas.canvasy(0))
+    x1 = min(x0 + canvas.winfo_width(), image.width*scale)
+    y1 = min(y0 + canvas.winfo_height(), image.height*scale)
+    visible = [(tx, ty) for ty in range(y0 // _TILE_SIZE, -(-y1 // _TILE_SIZE))
+                        for tx in range(x0 // _TILE_SIZE, -(-x1 // _TILE_SIZE))]
+
+    src_size = _TILE_SIZE // scale
+    for tx, ty in visible:
+        if (tx, ty) in tiles:
+            tiles.move_to_end((tx, ty))
+            continue
+        tile = image.crop((tx*src_size, ty*src_size, min((tx+1)*src_size, image.width),
+                           min((ty+1)*src_size, image.height)))
+        tile = tile.resize((tile.width*scale, tile.height*scale), Image.NEAREST)
+        photo = ImageTk.PhotoImage(tile, master=canvas)
+        item = canvas.create_image((tx*_TILE_SIZE, ty*_TILE_SIZE), image=photo, anchor=tk.NW)
+        tiles[(tx, ty)] = (item, photo)
+
+    while len(tiles) > _MAX_CACHED_TILES:
+        oldest = next(iter(tiles))
+        if oldest in visible: # Only on huge screens: every remaining tile is still in view
+            break
+        canvas.delete(tiles.pop(oldest)[0])
+
+
+def _make_scrollable_toplevel(width, height, use_scrollers, wintitle, max_width_ratio=0.86,
+                              on_view_change=None):
+    """
+    Creates the top-level window shared by all visualizations, with a canvas whose drawing
+    is of the given width & height. If use_scrollers is set, the canvas is limited to 0.86 of
+    the screen's height (and to max_width_ratio of its width) and scrolls natively over its
+    drawing with scrollbars. on_view_change, if given, is called with the canvas whenever it
+    is scrolled or resized. Returns (cwin, canvas).
     """
-    # For proper scrolling, need to  (as frames don't have scrollbars)
     cwin = tk.Toplevel(root)
-    C = tk.Canvas(cwin, name='c')
-    cframe = ttk.Frame(C, name='f')
-    canvas = tk.Canvas(cframe, name='canvas')
-    C.grid(row=0,column=0,sticky='nsew')
+    canvas = tk.Canvas(cwin, name='canvas')
+    canvas.grid(row=0,column=0,sticky='nsew')
 
-    # Configuring top-level elements...
+    # The canvas is sized (and its scrollregion fixed) first, before its scrollbars are wired up
+    # and anything is added to it, so that it doesn't recompute its layout as items arrive.
     if use_scrollers:
-        yscroller = ttk.Scrollbar(cwin, command=C.yview, orient='vertical')
-        xscroller = ttk.Scrollbar(cwin, command=C.xview, orient='horizontal')
-        C['xscrollcommand'] = xscroller.set
-        C['yscrollcommand'] = yscroller.set
+        canvas['width'] = min(width, max_width_ratio*_SCREEN_W)
+        canvas['height'] = 0.86*_SCREEN_H
+        canvas['scrollregion'] = (0, 0, width, height)
+        cwin.geometry('+%d+%d'%(5,5))
+
+        xview, yview = canvas.xview, canvas.yview
+        if on_view_change:
+            def xview(*args):
+                canvas.xview(*args)
+                on_view_change(canvas)
+            def yview(*args):
+                canvas.yview(*args)
+                on_view_change(canvas)
+            canvas.bind('<Configure>', lambda evt: on_view_change(canvas))
+        yscroller = ttk.Scrollbar(cwin, command=yview, orient='vertical')
+        xscroller = ttk.Scrollbar(cwin, command=xview, orient='horizontal')
+        canvas['xscrollcommand'] = xscroller.set
+        canvas['yscrollcommand'] = yscroller.set
         yscroller.grid(row=0,column=1,sticky='nsw')
         xscroller.grid(row=1,column=0,sticky='ewn')
+    else:
+        canvas['width'] = width
+        canvas['height'] = height
+        cwin.resizable(False, False)
+
+    cwin.title(wintitle)
+    cwin.bind("<Control-s>", save_canvas_to_png)
+    return cwin, canvas
 
-    C.create_window(0,0, window=cframe, anchor='nw')
-    canvas.grid(row=0, column=0, sticky='nw')
 
-    if not title_count:
-        title_count = " - 1 in " + "{0:,}".format(width*height)
+def draw_canvas_grid(width, height, use_scrollers, wintitle, inset_width=0, title_count=None):
+    """
+    This is the workhorse function that takes a width and a height and draws a corresponding
+    grid using tk.Canvas. The grid is rendered as a NumPy pixel-array (or with PIL, if NumPy isn't
+    installed) into a PIL image from the shared _build_pil_image cache. The scrollbars are only
+    created if the canvas-grid overflows the screen's dimensions (e.g. if it's greater than 0.86
+    of the screen's height), in which case the 1x image is built right away, and only the tiles
+    of it that are scrolled into view are ever shown on the canvas. Otherwise, the canvas shows
+    a double-scale image, and the 1x one is only built (or reused) if the user saves the grid.
+    """
+    title_count = title_count or f" - 1 in {width*height:,}"
+    show_tiles = None
+    if use_scrollers:
+        show_tiles = functools.partial(_show_visible_tiles,
+                                       image=_build_pil_image(width, height, inset_width))
+    cwin, canvas = _make_scrollable_toplevel(width*2, height*2, use_scrollers,
+                                             f"{wintitle}{title_count}",
+                                             on_view_change=show_tiles)
     cwin.columnconfigure(0, weight=1)
     cwin.rowconfigure(0, weight=1)
-    cwin.title(wintitle + title_count)
     cwin['bg'] = "#dddddd"
 
-    C['bg'] = "black"
-    C['highlightthickness'] = 0
-
     canvas['background'] = '#000000'
-    canvas['width'] = width*2
-    canvas['height'] = height*2
-
-    # Draw the grid image on canvas, at double-scale...
-    canvas.img = tk.PhotoImage(width = width*2, height = height*2)
-    canvas.create_image((2, 2), image = canvas.img, state = "normal", anchor = tk.NW)
-
-    canvas.img.put(_get_grid_pattern_string("#000000"), to=(0, 0, width*2, height*2))
-    canvas.create_rectangle((2,2,3,3),outline="red",fill="red")
-
-    # We draw the image in parallel using PIL, without displaying it. Used for saving to PNG...
-    even_row_bytes = b""
-    odd_row_bytes = b""
-    for i in range(width):
-        even_row_bytes += b"\x00\x00\x00" if i % 2 else b"\xff\xff\xff"
-        odd_row_bytes += b"\xff\xff\xff" if i % 2 else b"\x00\x00\x00"
-    pixel_bytes = (even_row_bytes + odd_row_bytes) * ((height+1)//2)
-
-    pil_img = Image.frombytes("RGB", (width, height), pixel_bytes)
-    draw = ImageDraw.Draw(pil_img)
-    canvas.image = pil_img
-
-    if inset_width: # inset_height == inset_width
-        canvas.img.put(_get_grid_pattern_string("green"), to=(0, 0, inset_width*2, inset_width*2))
-        for i in range(0, inset_width, 2):
-            draw.line([i,0,i,inset_width], 'green')
-        for i in range(0, inset_width, 2):
-            draw.line([0,i,inset_width,i], 'green')
-
-    draw.line([1,1,1,1],'red')
+    canvas['highlightthickness'] = 0
 
+    # Show the grid on canvas at double-scale, as one image-item that Tk simply blits on redraws.
+    # With no highlight-border, the canvas is exactly the image's size and the image sits at 0,0.
+    # Scrolling grids get their tiles instead, from show_tiles, as they're scrolled into view.
+    # Only the grid's parameters are kept for saving, which fetches the 1x image from the cache
+    # (already there for scrolling grids, whose tiles are cropped from it)...
     if use_scrollers:
-        C['width'] = 0.86*root.winfo_screenwidth()
-        C['height'] = 0.86*root.winfo_screenheight()
-        C['scrollregion'] = (0, 0, width*2, height*2)
-        cwin.geometry('+%d+%d'%(5,5))
+        canvas.tiles = collections.OrderedDict() # (tile_x, tile_y) -> (item, PhotoImage)
     else:
-        C['width'] = width*2
-        C['height'] = height*2
-        cwin.resizable(False, False)
-
-    cwin.bind("<Control-s>", save_canvas_to_png)
+        canvas.img = ImageTk.PhotoImage(_build_pil_image(width, height, inset_width, scale=2),
+                                        master=canvas)
+        canvas.create_image((0, 0), image = canvas.img, state = "normal", anchor = tk.NW)
+    canvas.image_recipe = (_build_pil_image, (width, height, inset_width))
 
 
 def draw_earth_sun_diagram():
     """
     This is a variant of the function above that draws earth's orbit around the sun
-    instead of a pixel-grid. The basic canvas-level logic is the same, but it uses
-    create_oval instead of create_line. The image is again drawn in parallel using
-    both tk.Canvas and PIL's ImageDraw so as to allow proper saving to PNG.
+    instead of a pixel-grid. The basic canvas-level logic is the same, but it draws two
+    canvas ovals instead of a single grid-image. The ovals are also recorded as ImageDraw
+    operations, which are replayed with PIL only when the image is saved to PNG.
     """
-    cwin = tk.Toplevel(root)
-    C = tk.Canvas(cwin, name='c')
-    cframe = ttk.Frame(C, name='f')
-    canvas = tk.Canvas(cframe, name='canvas')
-    C.grid(row=0,column=0,sticky='nsew')
-    C.create_window(0,0, window=cframe, anchor='nw')
-    canvas.grid(row=0, column=0, sticky='nw')
-
     orbital_diameter = round(8 * S_TO_EO_DIAMETER_RATIO)
     orbital_radius = round(orbital_diameter/2)
 
-    canvas['width'] =  orbital_diameter + 8
-    canvas['height'] = orbital_diameter + 8
+    use_scrollers = (orbital_diameter > 0.86*_SCREEN_H or
+                     orbital_diameter > 0.96*_SCREEN_W)
+    cwin, canvas = _make_scrollable_toplevel(
+        orbital_diameter + 8, orbital_diameter + 8, use_scrollers,
+        "The Earth is an invisible speck in space, with a diameter < 1% of the Sun's",
+        max_width_ratio=0.96)
+    cwin.resizable(False, False)
 
-    # We draw the image in parallel using PIL, without displaying it. Used for saving to PNG...
-    image = Image.new("RGB", (orbital_diameter+8, orbital_diameter+8), "white")
-    draw = ImageDraw.Draw(image)
-    canvas.image = image
-
-    canvas.create_oval(4, 4, 4+orbital_diameter, 4+orbital_diameter)
-    draw.ellipse([4, 4, 4+orbital_diameter, 4+orbital_diameter], outline="black")
-    canvas.create_oval(orbital_radius, orbital_radius, orbital_radius+8, orbital_radius+8,
-                       outline="orange",fill="red")
-    draw.ellipse([orbital_radius, orbital_radius, orbital_radius+8, orbital_radius+8],
-                 outline="orange",fill="red")
-
-    if orbital_diameter > 0.86*root.winfo_screenheight() or orbital_diameter > 0.96*root.winfo_screenwidth():
-        yscroller = ttk.Scrollbar(cwin, command=C.yview, orient='vertical')
-        xscroller = ttk.Scrollbar(cwin, command=C.xview, orient='horizontal')
-        C['xscrollcommand'] = xscroller.set
-        C['yscrollcommand'] = yscroller.set
-        yscroller.grid(row=0,column=1,sticky='nsw')
-        xscroller.grid(row=1,column=0,sticky='ewn')
-        if orbital_diameter > 0.96*root.winfo_screenwidth():
-            C['width'] = 0.96*root.winfo_screenwidth()
-        else:
-            C['width'] = orbital_diameter + 8
-        C['height'] = 0.86*root.winfo_screenheight()
-        C['scrollregion'] = (0, 0, orbital_diameter+8, orbital_diameter+8)
-        cwin.geometry('+%d+%d'%(5,5))
-    else:
-        C['width'] = orbital_diameter + 8
-        C['height'] = orbital_diameter + 8
+    outer_bbox = (4, 4, 4+orbital_diameter, 4+orbital_diameter)
+    sun_bbox = (orbital_radius, orbital_radius, orbital_radius+8, orbital_radius+8)
+    canvas.create_oval(*outer_bbox)
+    canvas.create_oval(*sun_bbox, outline="orange", fill="red")
 
-    cwin.resizable(False, False)
-    cwin.title("The Earth is an invisible speck in space, with a diameter < 1% of the Sun's")
-    cwin.bind("<Control-s>", save_canvas_to_png)
+    # The same shapes are recorded for PIL, which only draws them if the user saves to PNG...
+    draw_ops = [('ellipse', outer_bbox, {'outline': 'black'}),
+                ('ellipse', sun_bbox, {'outline': 'orange', 'fill': 'red'})]
+    canvas.image_recipe = (_draw_pil_image, ((orbital_diameter+8, orbital_diameter+8), draw_ops))
+
+
+def _draw_pil_image(size, draw_ops):
+    """
+    Replays a list of recorded (method, bbox, options) ImageDraw operations
+    on a new white PIL image of the given size, and returns that image.
+    """
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for method, bbox, options in draw_ops:
+        getattr(draw, method)(bbox, **options)
+    return image
 
 
 def create_ratio_visualization(ratio, wintitle, subratio=None, title_count=None):
@@ -196,69 +312,86 @@ def create_ratio_visualization(ratio, wintitle, subratio=None, title_count=None)
     A helper function that takes in a ratio and a sub-ratio, as well as a window title,
     and calls the workhorse function above to draw appropriately sized pixel-grids. You
     basically pass in a ratio-number such as 300,000 and it auto-creates a grid containing
-    roughly that many pixels, making best-use of the screen's aspect ratio.
+    roughly that many pixels, making best-use of the screen's aspect ratio. Ratios above
+    MAX_GRID_PIXELS are scaled down to that many pixels, as noted in the window title.
     """
-    screen_width = root.winfo_screenwidth()
-    screen_height = root.winfo_screenheight()
-    aspect_ratio = screen_width / screen_height
+    aspect_ratio = _SCREEN_W / _SCREEN_H
     gridheight = round((ratio/aspect_ratio)**0.5)
     gridwidth = round(aspect_ratio*gridheight)
-    use_scrollers = True if gridheight > 0.45*screen_height else False
     inset_width = round(subratio**0.5) if subratio else 0
+
+    if gridwidth*gridheight > MAX_GRID_PIXELS:
+        # Grids this big would need GBs of memory, so they're scaled down (insets included)...
+        scale = (MAX_GRID_PIXELS / (gridwidth*gridheight))**0.5
+        title_count = (title_count or
+                       f" - 1 in {ratio:,} (scaled down to {MAX_GRID_PIXELS:,} pixels)")
+        gridwidth = max(1, int(gridwidth*scale))
+        gridheight = max(1, int(gridheight*scale))
+        inset_width = max(1, int(inset_width*scale)) if inset_width else 0
+
+    use_scrollers = True if gridheight > 0.45*_SCREEN_H else False
     draw_canvas_grid(gridwidth, gridheight, use_scrollers, wintitle, inset_width, title_count)
 
 
+def _save_image(image_recipe, filepath):
+    """Builds an image from its (build_image, build_args) recipe, and saves it to filepath"""
+    build_image, build_args = image_recipe
+    build_image(*build_args).save(filepath, **_PNG_SAVE_OPTIONS)
+
+
 def save_canvas_to_png(evt=None):
     """
-    This function takes the in-memory image drawn using PIL's ImageDraw module and saves it
-    as a PNG file using the filepath selected by the user via the save-file-as dialog.
+    This function builds the PIL image of the window's canvas from the image-recipe stored on
+    it, and saves it as a PNG file using the filepath selected by the user via the save-file-as
+    dialog.
     """
     cwin = evt.widget
-    canvas = cwin.nametowidget(str(cwin) + ".c.f.canvas")
+    canvas = cwin.nametowidget(str(cwin) + ".canvas")
     filepath = tkfd.asksaveasfilename(defaultextension=".png", filetypes=[("PNG Files","*.png")])
     if not filepath:
         return
     temp_tk = tk.Toplevel(root)
     temp_tk.title("Saving file...")
     temp_tk.geometry("")
-    temp_pb = ttk.Progressbar(temp_tk)
+    temp_pb = ttk.Progressbar(temp_tk, mode='indeterminate')
     temp_pb.pack()
     temp_tk.transient(root)
     temp_tk.geometry("+%d+%d" % (400, 200))
-    temp_pb.step(20)
-    root.update()
-    canvas.image.save(filepath)
-    temp_pb.step(60)
-    root.update()
-    temp_tk.destroy()
+    temp_pb.start(10)
+
+    # The image is built and PNG-encoded in a worker thread, so the UI doesn't freeze meanwhile...
+    future = _save_pool.submit(_save_image, canvas.image_recipe, filepath)
+    def poll_save():
+        if not future.done():
+            temp_tk.after(50, poll_save)
+            return
+        temp_pb.stop()
+        temp_tk.destroy()
+        if future.exception():
+            tk.messagebox.showerror("Saving Failed", str(future.exception()))
+    temp_tk.after(50, poll_save)
 
 ##############################################################################################
 
-def create_spatial_visualizations():
+def _is_float(text):
     """
-    This function takes the area-values entered by the user and calls the
-    create_ratio_visualization function with appropriate ratio-parameters.
-    It also calls the draw_earth_sun_diagram function, resulting in
-    3 new top-level windows being created.
+    Key-validation command for the area entries: accepts only plain decimals, including their
+    incomplete prefixes (like "", "-" or "12.") so the user can still type and delete freely.
     """
-    house_area = float(entry_HA.get())
-    if ha_unit.get() == 'sq. feet':
-        house_area *= 0.092903
-    elif ha_unit.get() == 'sq. yards':
-        house_area *= 0.836127
+    return _NUM_PREFIX_RE.match(text) is not None
 
-    city_area = float(entry_CA.get())
-    if ca_unit.get() == 'sq. miles':
-        city_area = city_area * 2.58999 * 1000000
-    else:
-        city_area = city_area * 1000000
-    country_area = country_areas[combobox_COUNTRY.get()] * 1000000
-    world_area = 510072000 * 1000000
 
+def create_spatial_visualizations(house_area, city_area, country_area):
+    """
+    This function takes the areas (in square meters) of the user's house,
+    city and country and calls the create_ratio_visualization function with
+    appropriate ratio-parameters. It also calls the draw_earth_sun_diagram
+    function, resulting in 3 new top-level windows being created.
+    """
     h_to_c_ratio = round(city_area / house_area)
     create_ratio_visualization(h_to_c_ratio, "Your House in Your City")
 
-    c_to_w_ratio = round(world_area / city_area)
+    c_to_w_ratio = round(WORLD_AREA_M2 / city_area)
     c_to_c_ratio = round(country_area / city_area)
     create_ratio_visualization(c_to_w_ratio, "Your City in Your Country and the World",
                                subratio=c_to_c_ratio)
@@ -270,23 +403,31 @@ def validate_form_and_create_spatial_visualizations(evt=None):
     """
     Performs basic validation of the user's spatial area inputs.
     It shows a warning prompt if the inputs are invalid, and calls
-    the create_spatial_visualization function otherwise.
+    the create_spatial_visualization function otherwise. The entries' key-validation
+    already restricts them to plain decimals, so only incomplete ones (like "" or "-")
+    are left to reject here. They're parsed with Python's float(), as Tcl's own
+    number-parsing reads a leading zero as octal (e.g. "010" as 8).
     """
     error_msg = ""
-    try:
-        float1 = float(entry_HA.get())
-        float2 = float(entry_CA.get())
-    except:
+    ha_text = entry_HA.get()
+    ca_text = entry_CA.get()
+    if _NUM_RE.match(ha_text) and _NUM_RE.match(ca_text):
+        float1 = float(ha_text)
+        float2 = float(ca_text)
+    else:
         error_msg = "Please enter numeric area values"
     if not error_msg and (float1 <= 0 or float2 <= 0):
         error_msg = "Please enter positive area values"
-    if not error_msg and combobox_COUNTRY.get() not in countries_list:
+    country_name = combobox_COUNTRY.get()
+    if not error_msg and country_name not in _country_set:
         error_msg = "Please select a country-name from the dropdown list"
 
     if error_msg:
         tk.messagebox.showwarning("Invalid Input", error_msg)
     else:
-        create_spatial_visualizations()
+        create_spatial_visualizations(float1 * _HA_UNIT_FACTOR[ha_unit.get()],
+                                      float2 * _CA_UNIT_FACTOR[ca_unit.get()],
+                                      _country_areas_m2[country_name])
 
 
 def create_population_visualizations(evt=None):
@@ -314,6 +455,8 @@ if os.name == 'nt':
 
 root = tk.Tk()
 root.geometry("480x640")
+_SCREEN_W = root.winfo_screenwidth() # Cached, as each winfo call is a Tcl round-trip
+_SCREEN_H = root.winfo_screenheight()
 root.resizable(False, False)
 root.title("Contextual Visualizer")
 
@@ -346,8 +489,9 @@ pop_vis_button.grid(row=2, column=0, sticky=tk.E, pady=10)
 
 label_HA = ttk.Label(FS, text="House Area ")
 label_CA = ttk.Label(FS, text="City Area ")
-entry_HA = ttk.Entry(FS)
-entry_CA = ttk.Entry(FS)
+vcmd_NUM = (FS.register(_is_float), '%P')
+entry_HA = ttk.Entry(FS, validate='key', validatecommand=vcmd_NUM)
+entry_CA = ttk.Entry(FS, validate='key', validatecommand=vcmd_NUM)
 
 ha_unit = tk.StringVar(FS, 'sq. yards')
 option_HA_unit = ttk.OptionMenu(FS, ha_unit, "sq. yards", "sq. feet", "sq. yards", "sq. meters")
@@ -359,67 +503,279 @@ option_CA_unit.configure(takefocus=0)
 
 country = tk.StringVar(FS)
 
-country_areas = {"Russia": 17098242, "Canada": 9984670, "China": 9706961, "United States": 9372610,
-"Brazil": 8515767, "Australia": 7692024, "India": 3287590, "Argentina": 2780400,
-"Kazakhstan": 2724900, "Algeria": 2381741, "DR Congo": 2344858, "Greenland": 2166086,
-"Saudi Arabia": 2149690, "Mexico": 1964375, "Indonesia": 1904569, "Sudan": 1886068,
-"Libya": 1759540, "Iran": 1648195, "Mongolia": 1564110, "Peru": 1285216, "Chad": 1284000,
-"Niger": 1267000, "Angola": 1246700, "Mali": 1240192, "South Africa": 1221037, "Colombia": 1141748,
-"Ethiopia": 1104300, "Bolivia": 1098581,"Mauritania": 1030700, "Egypt": 1002450, "Tanzania": 945087,
-"Nigeria": 923768, "Venezuela": 916445, "Pakistan": 881912, "Namibia": 825615, "Mozambique": 801590,
-"Turkey": 783562, "Chile": 756102, "Zambia": 752612, "Myanmar": 676578, "Afghanistan": 652230,
-"Somalia": 637657, "Central African Republic": 622984, "South Sudan": 619745, "Ukraine": 603500,
-"Madagascar": 587041, "Botswana": 582000, "Kenya": 580367, "France": 551695, "Yemen": 527968,
-"Thailand": 513120, "Spain": 505992, "Turkmenistan": 488100, "Cameroon": 475442,
-"Papua New Guinea": 462840, "Sweden": 450295, "Uzbekistan": 447400, "Morocco": 446550,
-"Iraq": 438317, "Paraguay": 406752, "Zimbabwe": 390757, "Japan": 377930, "Germany": 357114,
-"Philippines": 342353, "Congo": 342000, "Finland": 338424, "Vietnam": 331212,
-"Malaysia": 330803, "Norway": 323802, "Cote d'Ivoire": 322463, "Poland": 312679, "Oman": 309500,
-"Italy": 301336, "Ecuador": 276841, "Burkina Faso": 272967, "New Zealand": 270467, "Gabon": 267668,
-"Western Sahara": 266000, "Guinea": 245857, "United Kingdom": 242900, "Uganda": 241550,
-"Ghana": 238533, "Romania": 238391, "Laos": 236800, "Guyana": 214969, "Belarus": 207600,
-"Kyrgyzstan": 199951, "Senegal": 196722, "Syria": 185180, "Cambodia": 181035, "Uruguay": 181034,
-"Suriname": 163820, "Tunisia": 163610, "Bangladesh": 147570, "Nepal": 147181, "Tajikistan": 143100,
-"Greece": 131990, "Nicaragua": 130373, "North Korea": 120538, "Malawi": 118484, "Eritrea": 117600,
-"Benin": 112622, "Honduras": 112492, "Liberia": 111369, "Bulgaria": 110879, "Cuba": 109884,
-"Guatemala": 108889, "Iceland": 103000, "South Korea": 100210, "Hungary": 93028, "Portugal": 92090,
-"Jordan": 89342, "Serbia": 88361, "Azerbaijan": 86600, "Austria": 83871,
-"United Arab Emirates": 83600, "French Guiana": 83534, "Czechia": 78865, "Panama": 75417,
-"Sierra Leone": 71740, "Ireland": 70273, "Georgia": 69700, "Sri Lanka": 65610, "Lithuania": 65300,
-"Latvia": 64559, "Togo": 56785, "Croatia": 56594, "Bosnia and Herzegovina": 51209,
-"Costa Rica": 51100, "Slovakia": 49037, "Dominican Republic": 48671, "Estonia": 45227,
-"Denmark": 43094, "Netherlands": 41850, "Switzerland": 41284, "Bhutan": 38394, "Taiwan": 36193,
-"Guinea-Bissau": 36125, "Moldova": 33846, "Belgium": 30528, "Lesotho": 30355, "Armenia": 29743,
-"Solomon Islands": 28896, "Albania": 28748, "Equatorial Guinea": 28051, "Burundi": 27834,
-"Haiti": 27750, "Rwanda": 26338, "Republic of North Macedonia": 25713, "Djibouti": 23200,
-"Belize": 22966, "El Salvador": 21041, "Israel": 20770, "Slovenia": 20273, "New Caledonia": 18575,
-"Fiji": 18272, "Kuwait": 17818, "Eswatini": 17364, "Timor-Leste": 14874, "Bahamas": 13943,
-"Montenegro": 13812, "Vanuatu": 12189, "Falkland Islands": 12173, "Qatar": 11586, "Jamaica": 10991,
-"Gambia": 10689, "Lebanon": 10452, "Cyprus": 9251, "Puerto Rico": 8870, "State of Palestine": 6220,
-"Brunei Darussalam": 5765, "Trinidad and Tobago": 5130,"French Polynesia": 4167, "Cabo Verde": 4033,
-"Samoa": 2842, "Luxembourg": 2586, "Reunion": 2511, "Mauritius": 2040, "Comoros": 1862,
-"Guadeloupe": 1628, "Faeroe Islands": 1393, "Martinique": 1128, "Sao Tome and Principe": 964,
-"Turks and Caicos Islands": 948, "Kiribati": 811, "Bahrain": 765, "Dominica": 751, "Tonga": 747,
-"Singapore": 710, "Micronesia": 702, "Saint Lucia": 616, "Isle of Man": 572, "Guam": 549,
-"Andorra": 468, "Northern Mariana Islands": 464, "Palau": 459, "Seychelles": 452, "Curacao": 444,
-"Antigua and Barbuda": 442, "Barbados": 430, "Saint Helena": 394,
-"Saint Vincent and the Grenadines": 389, "Mayotte": 374, "United States Virgin Islands": 347,
-"Grenada": 344, "Caribbean Netherlands": 328, "Malta": 316, "Maldives": 300, "Cayman Islands": 264,
-"Saint Kitts and Nevis": 261, "Niue": 260, "Saint Pierre and Miquelon": 242, "Cook Islands": 236,
-"American Samoa": 199, "Marshall Islands": 181, "Aruba": 180, "Liechtenstein": 160,
-"British Virgin Islands": 151, "Wallis and Futuna Islands": 142, "Montserrat": 102, "Anguilla": 91,
-"San Marino": 61, "Bermuda": 54, "Saint Martin": 53, "Sint Maarten": 34, "Tuvalu": 26, "Nauru": 21,
-"Saint Barthelemy": 21, "Tokelau": 12, "Gibraltar": 6, "Monaco": 2}
-
-countries_list = sorted(country_areas.keys())
+# One "<country-name> <area in sq. kms>" entry per line, parsed once into the country_areas dict
+_COUNTRY_AREAS_TABLE = """
+Russia 17098242
+Canada 9984670
+China 9706961
+United States 9372610
+Brazil 8515767
+Australia 7692024
+India 3287590
+Argentina 2780400
+Kazakhstan 2724900
+Algeria 2381741
+DR Congo 2344858
+Greenland 2166086
+Saudi Arabia 2149690
+Mexico 1964375
+Indonesia 1904569
+Sudan 1886068
+Libya 1759540
+Iran 1648195
+Mongolia 1564110
+Peru 1285216
+Chad 1284000
+Niger 1267000
+Angola 1246700
+Mali 1240192
+South Africa 1221037
+Colombia 1141748
+Ethiopia 1104300
+Bolivia 1098581
+Mauritania 1030700
+Egypt 1002450
+Tanzania 945087
+Nigeria 923768
+Venezuela 916445
+Pakistan 881912
+Namibia 825615
+Mozambique 801590
+Turkey 783562
+Chile 756102
+Zambia 752612
+Myanmar 676578
+Afghanistan 652230
+Somalia 637657
+Central African Republic 622984
+South Sudan 619745
+Ukraine 603500
+Madagascar 587041
+Botswana 582000
+Kenya 580367
+France 551695
+Yemen 527968
+Thailand 513120
+Spain 505992
+Turkmenistan 488100
+Cameroon 475442
+Papua New Guinea 462840
+Sweden 450295
+Uzbekistan 447400
+Morocco 446550
+Iraq 438317
+Paraguay 406752
+Zimbabwe 390757
+Japan 377930
+Germany 357114
+Philippines 342353
+Congo 342000
+Finland 338424
+Vietnam 331212
+Malaysia 330803
+Norway 323802
+Cote d'Ivoire 322463
+Poland 312679
+Oman 309500
+Italy 301336
+Ecuador 276841
+Burkina Faso 272967
+New Zealand 270467
+Gabon 267668
+Western Sahara 266000
+Guinea 245857
+United Kingdom 242900
+Uganda 241550
+Ghana 238533
+Romania 238391
+Laos 236800
+Guyana 214969
+Belarus 207600
+Kyrgyzstan 199951
+Senegal 196722
+Syria 185180
+Cambodia 181035
+Uruguay 181034
+Suriname 163820
+Tunisia 163610
+Bangladesh 147570
+Nepal 147181
+Tajikistan 143100
+Greece 131990
+Nicaragua 130373
+North Korea 120538
+Malawi 118484
+Eritrea 117600
+Benin 112622
+Honduras 112492
+Liberia 111369
+Bulgaria 110879
+Cuba 109884
+Guatemala 108889
+Iceland 103000
+South Korea 100210
+Hungary 93028
+Portugal 92090
+Jordan 89342
+Serbia 88361
+Azerbaijan 86600
+Austria 83871
+United Arab Emirates 83600
+French Guiana 83534
+Czechia 78865
+Panama 75417
+Sierra Leone 71740
+Ireland 70273
+Georgia 69700
+Sri Lanka 65610
+Lithuania 65300
+Latvia 64559
+Togo 56785
+Croatia 56594
+Bosnia and Herzegovina 51209
+Costa Rica 51100
+Slovakia 49037
+Dominican Republic 48671
+Estonia 45227
+Denmark 43094
+Netherlands 41850
+Switzerland 41284
+Bhutan 38394
+Taiwan 36193
+Guinea-Bissau 36125
+Moldova 33846
+Belgium 30528
+Lesotho 30355
+Armenia 29743
+Solomon Islands 28896
+Albania 28748
+Equatorial Guinea 28051
+Burundi 27834
+Haiti 27750
+Rwanda 26338
+Republic of North Macedonia 25713
+Djibouti 23200
+Belize 22966
+El Salvador 21041
+Israel 20770
+Slovenia 20273
+New Caledonia 18575
+Fiji 18272
+Kuwait 17818
+Eswatini 17364
+Timor-Leste 14874
+Bahamas 13943
+Montenegro 13812
+Vanuatu 12189
+Falkland Islands 12173
+Qatar 11586
+Jamaica 10991
+Gambia 10689
+Lebanon 10452
+Cyprus 9251
+Puerto Rico 8870
+State of Palestine 6220
+Brunei Darussalam 5765
+Trinidad and Tobago 5130
+French Polynesia 4167
+Cabo Verde 4033
+Samoa 2842
+Luxembourg 2586
+Reunion 2511
+Mauritius 2040
+Comoros 1862
+Guadeloupe 1628
+Faeroe Islands 1393
+Martinique 1128
+Sao Tome and Principe 964
+Turks and Caicos Islands 948
+Kiribati 811
+Bahrain 765
+Dominica 751
+Tonga 747
+Singapore 710
+Micronesia 702
+Saint Lucia 616
+Isle of Man 572
+Guam 549
+Andorra 468
+Northern Mariana Islands 464
+Palau 459
+Seychelles 452
+Curacao 444
+Antigua and Barbuda 442
+Barbados 430
+Saint Helena 394
+Saint Vincent and the Grenadines 389
+Mayotte 374
+United States Virgin Islands 347
+Grenada 344
+Caribbean Netherlands 328
+Malta 316
+Maldives 300
+Cayman Islands 264
+Saint Kitts and Nevis 261
+Niue 260
+Saint Pierre and Miquelon 242
+Cook Islands 236
+American Samoa 199
+Marshall Islands 181
+Aruba 180
+Liechtenstein 160
+British Virgin Islands 151
+Wallis and Futuna Islands 142
+Montserrat 102
+Anguilla 91
+San Marino 61
+Bermuda 54
+Saint Martin 53
+Sint Maarten 34
+Tuvalu 26
+Nauru 21
+Saint Barthelemy 21
+Tokelau 12
+Gibraltar 6
+Monaco 2
+"""
+
+country_areas = {name: int(area) for name, area in
+                 (line.rsplit(" ", 1) for line in _COUNTRY_AREAS_TABLE.strip().split("\n"))}
+
+_country_areas_m2 = {k: v*1_000_000 for k, v in country_areas.items()}
+countries_list = tuple(sorted(country_areas, key=str.lower))
+_countries_lower = tuple(c.lower() for c in countries_list) # Sorted too, for bisecting
+_country_set = frozenset(country_areas)
+
+_NON_EDITING_KEYSYMS = frozenset(('Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R',
+                                  'Caps_Lock', 'Left', 'Right', 'Up', 'Down', 'Home', 'End'))
+
+def _apply_country_filter(widget):
+    """
+    Filter's the combobox's drop-down list entries based on what the user has entered.
+    The countries starting with the entered text form a contiguous run of the sorted
+    list, which is found with two binary searches. The drop-down list is only reassigned
+    if its entries have actually changed.
+    """
+    widget._filter_after_id = None
+    value = widget.get().lower()
+    start = bisect.bisect_left(_countries_lower, value)
+    end = bisect.bisect_left(_countries_lower, value + '\uffff', start)
+    values = countries_list[start:end]
+    if values != getattr(widget, '_prev_values', countries_list):
+        widget._prev_values = values
+        widget['values'] = values
 
 def filter_countries(event):
-    """Filter's the combobox's drop-down list entries based on what the user has entered"""
-    value = event.widget.get()
-    if value == '':
-        event.widget['values'] = countries_list
-    else:
-        event.widget['values'] = [c for c in countries_list if c.lower().startswith(value.lower())]
+    """
+    Debounces the combobox's KeyRelease events, so that the drop-down list is only
+    filtered once the user pauses typing for 80ms, instead of after every keystroke.
+    """
+    if event.keysym in _NON_EDITING_KEYSYMS:
+        return
+    widget = event.widget
+    if getattr(widget, '_filter_after_id', None):
+        widget.after_cancel(widget._filter_after_id)
+    widget._filter_after_id = widget.after(80, _apply_country_filter, widget)
 
 combobox_COUNTRY = ttk.Combobox(FS, textvariable=country, values=countries_list)
 combobox_COUNTRY.bind('<KeyRelease>', filter_countries)